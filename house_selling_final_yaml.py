@@ -51,9 +51,13 @@ def init_db():
         c.execute('''CREATE TABLE IF NOT EXISTS users (id INTEGER PRIMARY KEY, username TEXT UNIQUE, password TEXT, email TEXT)''')
         c.execute('''CREATE TABLE IF NOT EXISTS listings (
             id INTEGER PRIMARY KEY, user_id INTEGER, price REAL, bedrooms INTEGER, year_built INTEGER, 
-            garage_cars INTEGER, lot_area INTEGER, overall_qual INTEGER, image_path TEXT, expires_at TEXT, 
+            garage_cars INTEGER, lot_area INTEGER, overall_qual INTEGER, gr_liv_area INTEGER, image_path TEXT, expires_at TEXT, 
             lat REAL, lon REAL, interest_count INTEGER DEFAULT 0,
             FOREIGN KEY (user_id) REFERENCES users(id))''')
+        # Databases created before living area was collected lack the column
+        columns = [row[1] for row in c.execute("PRAGMA table_info(listings)")]
+        if "gr_liv_area" not in columns:
+            c.execute("ALTER TABLE listings ADD COLUMN gr_liv_area INTEGER")
         conn.commit()
     except Exception as e:
         logging.error(f"Database initialization failed: {e}")
@@ -200,21 +204,27 @@ def load_dataframe():
 
 df = load_dataframe()
 
-@st.cache_resource
-def load_model():
+# Keyed on the model file's mtime so a model promoted by retrain_model.py is picked up on the next rerun
+def model_mtime():
+    return os.path.getmtime(MODEL_FILE) if os.path.exists(MODEL_FILE) else None
+
+@st.cache_resource(max_entries=1)
+def load_model(mtime=None):
     try:
         return joblib.load(MODEL_FILE)
     except:
         if not df.empty:
-            X = df[['Gr Liv Area', 'Bedroom AbvGr', 'Year Built', 'Garage Cars', 'Lot Area', 'Overall Qual']]
-            y = df['SalePrice']
+            # Every 5th row is left out as the reference set used by retrain_model.py
+            train = df[df.index % 5 != 0]
+            X = train[['Gr Liv Area', 'Bedroom AbvGr', 'Year Built', 'Garage Cars', 'Lot Area', 'Overall Qual']]
+            y = train['SalePrice']
             model = xgboost.XGBRegressor(n_estimators=200)
             model.fit(X, y)
             joblib.dump(model, MODEL_FILE)
             return model
         return None
 
-model = load_model()
+model = load_model(model_mtime())
 
 # === Real-Time Updates ===
 def poll_listings():
@@ -311,6 +321,7 @@ elif page == t["sell"]:
         year_built = st.number_input("Year Built", min_value=1900, max_value=2025)
         garage_cars = st.number_input("Garage Spaces", min_value=0)
         lot_area = st.number_input("Lot Area", min_value=0)
+        gr_liv_area = st.number_input("Living Area (sq ft)", min_value=1)
         overall_qual = st.slider("Overall Quality", 1, 10, 5)
         lat = st.number_input("Latitude", value=DEFAULT_COORDINATES[0])
         lon = st.number_input("Longitude", value=DEFAULT_COORDINATES[1])
@@ -325,8 +336,8 @@ elif page == t["sell"]:
                 conn = sqlite3.connect(DATABASE_NAME)
                 c = conn.cursor()
                 expires_at = (datetime.now() + timedelta(days=expires_in)).isoformat()
-                c.execute("INSERT INTO listings (user_id, price, bedrooms, year_built, garage_cars, lot_area, overall_qual, image_path, expires_at, lat, lon) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
-                          (st.session_state.user_id, price, bedrooms, year_built, garage_cars, lot_area, overall_qual, image_path, expires_at, lat, lon))
+                c.execute("INSERT INTO listings (user_id, price, bedrooms, year_built, garage_cars, lot_area, overall_qual, gr_liv_area, image_path, expires_at, lat, lon) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                          (st.session_state.user_id, price, bedrooms, year_built, garage_cars, lot_area, overall_qual, gr_liv_area, image_path, expires_at, lat, lon))
                 conn.commit()
                 conn.close()
                 st.success("House listed successfully!")
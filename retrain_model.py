@@ -0,0 +1,290 @@
+import argparse
+import json
+import logging
+import os
+import sqlite3
+import tempfile
+import time
+from datetime import datetime
+
+import joblib
+import numpy as np
+import pandas as pd
+import xgboost
+
+# === Config ===
+BASE_PATH = os.path.dirname(os.path.abspath(__file__))
+DATABASE_NAME = os.path.join(BASE_PATH, "houses.db")
+MODEL_FILE = os.path.join(BASE_PATH, "house_price_model.pkl")
+DATASET_PATH = os.path.join(BASE_PATH, "AmesHousing.csv")
+
+FEATURES = ['Gr Liv Area', 'Bedroom AbvGr', 'Year Built', 'Garage Cars', 'Lot Area', 'Overall Qual']
+# listings column -> model feature
+LISTING_COLUMNS = {
+    "gr_liv_area": "Gr Liv Area",
+    "bedrooms": "Bedroom AbvGr",
+    "year_built": "Year Built",
+    "garage_cars": "Garage Cars",
+    "lot_area": "Lot Area",
+    "overall_qual": "Overall Qual",
+}
+CHUNK_SIZE = 5000
+HOLDOUT_EVERY = 5  # every 5th listing id is held out for evaluation, then trained on in the next window
+REFERENCE_EVERY = 5  # every 5th Ames row is the fixed full-feature reference set, never trained on by load_model()
+REFERENCE_TOLERANCE = 0.25  # reject if the reference spread grows by more than 25%
+MIN_NEW_ROWS = 50
+NUM_BOOST_ROUND = 50
+MAX_TREES = 1000  # past this, rebuild from scratch instead of stacking more trees
+REBUILD_ROUNDS = 200  # same as the n_estimators load_model() starts with
+
+logging.basicConfig(filename="app.log", level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+
+def config_paths(config_file):
+    """Resolve (database, model, dataset) the same way house_selling_final_yaml.py does."""
+    import yaml
+
+    with open(config_file, "r", encoding="utf-8") as f:
+        config = yaml.safe_load(f)
+    return (
+        os.path.join(BASE_PATH, "data", config["paths"]["database"]),
+        os.path.join(BASE_PATH, config["paths"]["model"]),
+        os.path.join(BASE_PATH, config["paths"]["dataset"]),
+    )
+
+
+# === Watermark ===
+# last_listing_id: listings up to this id are consumed
+# holdout_after: holdout rows in (holdout_after, last_listing_id] have not been trained on yet
+# last_attempt_id: highest id seen by the last run, promoted or not
+def meta_path(model_file):
+    return os.path.splitext(model_file)[0] + ".meta.json"
+
+
+def load_meta(model_file):
+    meta = {"last_listing_id": 0, "holdout_after": 0, "last_attempt_id": 0}
+    try:
+        with open(meta_path(model_file), "r", encoding="utf-8") as f:
+            meta.update(json.load(f))
+    except FileNotFoundError:
+        pass
+    return meta
+
+
+def save_meta(model_file, meta):
+    tmp = meta_path(model_file) + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(meta, f)
+    os.replace(tmp, meta_path(model_file))
+
+
+# === Chunked Data ===
+def training_filter(meta, upper_id):
+    """New non-holdout listings plus the previous window's holdout rows."""
+    condition = (f"((id > ? AND id <= ? AND id % {HOLDOUT_EVERY} != 0) "
+                 f"OR (id > ? AND id <= ? AND id % {HOLDOUT_EVERY} = 0))")
+    return condition, (meta["last_listing_id"], upper_id, meta["holdout_after"], meta["last_listing_id"])
+
+
+def rebuild_filter(meta, upper_id):
+    """Every listing up to upper_id except the current holdout."""
+    condition = f"id <= ? AND NOT (id > ? AND id % {HOLDOUT_EVERY} = 0)"
+    return condition, (upper_id, meta["last_listing_id"])
+
+
+def holdout_filter(meta, upper_id):
+    return f"id > ? AND id <= ? AND id % {HOLDOUT_EVERY} = 0", (meta["last_listing_id"], upper_id)
+
+
+def count_listings(database, condition, params):
+    conn = sqlite3.connect(database)
+    try:
+        return conn.execute(f"SELECT COUNT(*) FROM listings WHERE price > 0 AND gr_liv_area > 0 AND {condition}",
+                            params).fetchone()[0]
+    finally:
+        conn.close()
+
+
+def listing_chunks(database, condition, params):
+    """Yield (X, y) DataFrames for usable listings matching condition, CHUNK_SIZE rows at a time."""
+    query = f"""
+        SELECT id, price, {', '.join(LISTING_COLUMNS)} FROM listings
+        WHERE price > 0 AND gr_liv_area > 0 AND {condition}
+        ORDER BY id
+    """
+    conn = sqlite3.connect(database)
+    try:
+        for chunk in pd.read_sql_query(query, conn, params=params, chunksize=CHUNK_SIZE):
+            X = chunk.rename(columns=LISTING_COLUMNS).reindex(columns=FEATURES).astype(float)
+            yield X, chunk["price"].astype(float)
+    finally:
+        conn.close()
+
+
+class ListingIter(xgboost.DataIter):
+    """Feeds listings to an external-memory DMatrix so only one chunk is held in memory."""
+
+    def __init__(self, database, condition, params, cache_dir):
+        self.database = database
+        self.condition = condition
+        self.params = params
+        self._chunks = None
+        super().__init__(cache_prefix=os.path.join(cache_dir, "listings"))
+
+    def next(self, input_data):
+        if self._chunks is None:
+            self._chunks = listing_chunks(self.database, self.condition, self.params)
+        chunk = next(self._chunks, None)
+        if chunk is None:
+            return 0
+        X, y = chunk
+        input_data(data=X, label=y)
+        return 1
+
+    def reset(self):
+        if self._chunks is not None:
+            self._chunks.close()
+        self._chunks = None
+
+
+def reference_chunks(dataset):
+    """Yield (X, y) for the fixed Ames reference rows, which have real values for every feature."""
+    for chunk in pd.read_csv(dataset, usecols=FEATURES + ['SalePrice'], chunksize=CHUNK_SIZE):
+        chunk = chunk[chunk.index % REFERENCE_EVERY == 0].dropna()
+        yield chunk[FEATURES].astype(float), chunk['SalePrice'].astype(float)
+
+
+def rmse(booster, chunks):
+    squared_error, count = 0.0, 0
+    for X, y in chunks:
+        preds = booster.predict(xgboost.DMatrix(X, feature_names=FEATURES))
+        squared_error += float(np.sum((preds - y.to_numpy()) ** 2))
+        count += len(y)
+    return (squared_error / count) ** 0.5 if count else None
+
+
+def reference_spread(booster, dataset):
+    """Std of log(pred / price) on the reference rows.
+
+    Subtracting the mean log ratio ignores an overall price-level shift, so a model that
+    follows the current market is not penalised against pre-drift Ames prices, while one
+    that has lost the structure of the features still is.
+    """
+    total, total_sq, count = 0.0, 0.0, 0
+    for X, y in reference_chunks(dataset):
+        preds = booster.predict(xgboost.DMatrix(X, feature_names=FEATURES))
+        log_ratio = np.log(np.clip(preds, 1, None)) - np.log(y.to_numpy())
+        total += float(np.sum(log_ratio))
+        total_sq += float(np.sum(log_ratio ** 2))
+        count += len(y)
+    if not count:
+        return None
+    return max(total_sq / count - (total / count) ** 2, 0.0) ** 0.5
+
+
+# === Retraining ===
+def retrain(database=DATABASE_NAME, model_file=MODEL_FILE, dataset=DATASET_PATH):
+    """Warm-start the saved model on listings added since the last watermark.
+
+    The listings holdout decides: the new model replaces the old one only if its RMSE
+    there does not regress. The Ames reference set is a loose sanity bound on top.
+    Returns True when a new model was promoted.
+    """
+    if not os.path.exists(model_file):
+        logging.info(f"Retraining skipped: no model at {model_file} yet")
+        return False
+
+    meta = load_meta(model_file)
+    watermark = meta["last_listing_id"]
+    since = max(watermark, meta["last_attempt_id"])
+    conn = sqlite3.connect(database)
+    try:
+        upper_id = conn.execute("SELECT MAX(id) FROM listings").fetchone()[0] or 0
+    finally:
+        conn.close()
+    new_rows = count_listings(database, "id > ? AND id <= ?", (since, upper_id))
+    if new_rows < MIN_NEW_ROWS:
+        logging.info(f"Retraining skipped: {new_rows} new listings since id {since}")
+        return False
+    meta["last_attempt_id"] = upper_id
+    train_rows = count_listings(database, *training_filter(meta, upper_id))
+    holdout_rows = count_listings(database, *holdout_filter(meta, upper_id))
+    if not train_rows or not holdout_rows:
+        save_meta(model_file, meta)
+        logging.info(f"Retraining skipped: {train_rows} training / {holdout_rows} holdout listings "
+                     f"in {watermark}-{upper_id}")
+        return False
+
+    current = joblib.load(model_file)
+    booster = current.get_booster()
+
+    rebuild = booster.num_boosted_rounds() + NUM_BOOST_ROUND > MAX_TREES
+    with tempfile.TemporaryDirectory() as cache_dir:
+        params = {k: v for k, v in current.get_xgb_params().items() if v is not None}
+        if rebuild:
+            it = ListingIter(database, *rebuild_filter(meta, upper_id), cache_dir)
+            dtrain = xgboost.DMatrix(it)
+            new_booster = xgboost.train(params, dtrain, num_boost_round=REBUILD_ROUNDS)
+        else:
+            it = ListingIter(database, *training_filter(meta, upper_id), cache_dir)
+            dtrain = xgboost.DMatrix(it)
+            new_booster = xgboost.train(params, dtrain, num_boost_round=NUM_BOOST_ROUND, xgb_model=booster)
+        # Free the cache pages before the directory is removed
+        del dtrain, it
+
+    old_rmse = rmse(booster, listing_chunks(database, *holdout_filter(meta, upper_id)))
+    new_rmse = rmse(new_booster, listing_chunks(database, *holdout_filter(meta, upper_id)))
+    old_reference = reference_spread(booster, dataset)
+    new_reference = reference_spread(new_booster, dataset)
+    if old_reference is None or new_reference is None:
+        logging.info(f"Reference check skipped: no usable rows in {dataset}")
+        reference_ok = True
+        reference_log = "reference n/a"
+    else:
+        reference_ok = new_reference <= old_reference * (1 + REFERENCE_TOLERANCE)
+        reference_log = f"reference spread {old_reference:.4f} -> {new_reference:.4f}"
+    if new_rmse > old_rmse or not reference_ok:
+        # Remember the attempt so the same window is not retrained until more listings arrive
+        save_meta(model_file, meta)
+        logging.info(f"Retrained model rejected: holdout RMSE {old_rmse:.2f} -> {new_rmse:.2f}, {reference_log}")
+        return False
+
+    model = xgboost.XGBRegressor()
+    model.load_model(bytearray(new_booster.save_raw("json")))
+    # Write then rename so running apps never load a half-written file
+    tmp = model_file + ".tmp"
+    joblib.dump(model, tmp)
+    os.replace(tmp, model_file)
+    meta.update({
+        "holdout_after": watermark,
+        "last_listing_id": upper_id,
+        "holdout_rmse": new_rmse,
+        "reference_spread": new_reference,
+        "trained_at": datetime.now().isoformat(),
+    })
+    save_meta(model_file, meta)
+    logging.info(f"Retrained model promoted ({'rebuilt' if rebuild else 'warm-started'}, "
+                 f"{new_booster.num_boosted_rounds()} trees): holdout RMSE {old_rmse:.2f} -> {new_rmse:.2f}, "
+                 f"{reference_log}, watermark {upper_id}")
+    return True
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Incrementally retrain the house price model from new listings.")
+    parser.add_argument("--db", default=DATABASE_NAME, help="SQLite database with the listings table")
+    parser.add_argument("--model", default=MODEL_FILE, help="Model file loaded by the apps")
+    parser.add_argument("--dataset", default=DATASET_PATH, help="Ames CSV holding the fixed reference set")
+    parser.add_argument("--config", help="Read --db/--model/--dataset from the yaml app's config (e.g. config2.0.yaml)")
+    parser.add_argument("--every", type=float, default=0, help="Repeat every N hours (default: run once)")
+    args = parser.parse_args()
+    if args.config:
+        args.db, args.model, args.dataset = config_paths(args.config)
+
+    while True:
+        try:
+            retrain(args.db, args.model, args.dataset)
+        except Exception as e:
+            logging.error(f"Retraining failed: {e}")
+        if not args.every:
+            break
+        time.sleep(args.every * 3600)